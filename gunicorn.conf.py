@@ -0,0 +1,33 @@
+# gunicorn.conf.py - Production server settings (loaded automatically by gunicorn)
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# gevent workers multiplex many in-flight upstream AI calls each
+worker_class = 'gevent'
+
+# One worker per CPU this process may actually run on; cpu_count() reports the
+# whole host, which in a container can mean dozens of workers on one core
+def available_cpus():
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+workers = int(os.environ.get('WEB_CONCURRENCY', available_cpus()))
+worker_connections = int(os.environ.get('WORKER_CONNECTIONS', 1000))
+
+# Hold client connections open so they are reused instead of piling up in TIME_WAIT
+keepalive = 75
+
+# Restart a worker whose event loop has been blocked this long; a summary
+# is bounded well below this by the upstream timeouts
+timeout = 60
+
+# Import the app once in the master and fork workers from it, so they share
+# its loaded modules copy-on-write instead of each importing them again
+preload_app = True
+
+def post_worker_init(worker):
+    """Start the app's per-process threads once the worker is running"""
+    from server import start_background_threads
+    start_background_threads()
@@ -1,36 +1,280 @@
 # server.py - Enhanced for Railway with multiple AI providers
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, stream_with_context
+from flask.json.provider import JSONProvider
+from flask_compress import Compress
 from flask_cors import CORS
 import os
+import orjson
+import httpx
+import redis
 import requests
-import feedparser
-from datetime import datetime, timedelta
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import hashlib
+import hmac
+from io import BytesIO
+from lxml import etree
+from cachetools import TTLCache
+from collections import defaultdict
+from dataclasses import dataclass
+from concurrent.futures import (FIRST_COMPLETED, Future, ThreadPoolExecutor, TimeoutError,
+                                as_completed, wait)
+from datetime import datetime
+from functools import lru_cache
+from itertools import count, zip_longest
+from types import MappingProxyType
+import atexit
+import logging
+import logging.handlers
+import queue
+import re
+import threading
 import time
 
-print("🚀 AI NEWS SERVER - Railway Deployment")
-print("=" * 50)
+# Log records are queued and written to stdout by a background listener
+# (started in start_background_threads), so request handlers never block on
+# the write to Railway's log pipe
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+_log_queue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_handler)
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+                    handlers=[_queue_handler])
+log = logging.getLogger("newsapi")
+# httpx logs every request at INFO; keep Groq calls out of the request log
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+log.info("🚀 AI NEWS SERVER - Railway Deployment")
 
 # Load environment variables
 HUGGINGFACE_API_KEY = os.environ.get("HUGGINGFACE_API_KEY")
-GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
+# GROQ_API_KEYS takes a comma-separated list; requests rotate across them so
+# each key's rate limit adds to the total
+GROQ_API_KEYS = tuple(key.strip() for key in os.environ.get(
+    "GROQ_API_KEYS", os.environ.get("GROQ_API_KEY", "")).split(',') if key.strip())
+GROQ_API_KEY = GROQ_API_KEYS[0] if GROQ_API_KEYS else None
 NEWSAPI_KEY = os.environ.get("NEWSAPI_KEY")
+GOOGLE_TRANSLATE_API_KEY = os.environ.get("GOOGLE_TRANSLATE_API_KEY")
+REDIS_URL = os.environ.get("REDIS_URL")
+# Bearer token required by /invalidate; the endpoint is disabled without one
+INVALIDATE_TOKEN = os.environ.get("INVALIDATE_TOKEN")
 SERVER_ENV = os.environ.get("RAILWAY_ENVIRONMENT", "production")
 
-print(f"Environment: {SERVER_ENV}")
-print(f"HuggingFace API: {'✅ Loaded' if HUGGINGFACE_API_KEY else '❌ Not found'}")
-print(f"Groq API: {'✅ Loaded' if GROQ_API_KEY else '❌ Not found'}")
-print(f"NewsAPI: {'✅ Loaded' if NEWSAPI_KEY else '❌ Not found'}")
-print("=" * 50)
+log.info("Environment: %s", SERVER_ENV)
+log.info("HuggingFace API: %s", '✅ Loaded' if HUGGINGFACE_API_KEY else '❌ Not found')
+log.info("Groq API: %s", f'✅ Loaded ({len(GROQ_API_KEYS)} keys)' if GROQ_API_KEY else '❌ Not found')
+log.info("NewsAPI: %s", '✅ Loaded' if NEWSAPI_KEY else '❌ Not found')
+log.info("Google Translate API: %s", '✅ Loaded' if GOOGLE_TRANSLATE_API_KEY else '❌ Not found')
+log.info("Redis cache: %s", '✅ Configured' if REDIS_URL else '❌ Not configured')
+log.info("Cache invalidation: %s", '✅ Enabled' if INVALIDATE_TOKEN else '❌ Disabled')
+
+class OrJSONProvider(JSONProvider):
+    """JSON provider backed by orjson instead of the stdlib encoder"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
-CORS(app)
+app.json = OrJSONProvider(app)
+CORS(app,
+     origins='*',
+     send_wildcard=True,
+     methods=['GET', 'POST', 'OPTIONS'],
+     allow_headers=['Content-Type', 'Authorization', 'Accept'],
+     max_age=86400)
+
+# Compress JSON bodies over 500 bytes, with brotli for clients that accept it
+# (it packs the Arabic and Kurdish translations noticeably tighter than gzip).
+# Streamed (SSE) responses are left alone so events still reach the client
+# as they are generated
+app.config.update(COMPRESS_ALGORITHM=['br', 'gzip'], COMPRESS_MIN_SIZE=500,
+                  COMPRESS_STREAMS=False)
+Compress(app)
+
+def json_response(payload, status=200):
+    """Serialize straight to bytes, skipping jsonify for large payloads"""
+    return Response(orjson.dumps(payload), status=status, mimetype='application/json')
+
+def raw_json_response(body, status=200):
+    """Respond with an already-serialized JSON body"""
+    return Response(body, status=status, mimetype='application/json')
+
+# Shared second-level cache across workers and restarts; short timeouts so
+# a Redis outage degrades to the in-process cache instead of stalling requests
+redis_client = (redis.Redis.from_url(REDIS_URL, socket_timeout=0.25,
+                                     socket_connect_timeout=0.25)
+                if REDIS_URL else None)
+REDIS_KEY_PREFIX = 'news:'
+NEWS_CACHE_TTL = 1800
+
+# In-process cache for news responses, keyed by (cache key, revision) and
+# holding the serialized JSON body so hits are served without re-encoding.
+# With Redis behind it, entries only need to live long enough to absorb bursts.
+news_cache = TTLCache(maxsize=2048, ttl=300 if redis_client else NEWS_CACHE_TTL)
+# Failed lookups are remembered briefly so a dead upstream isn't hammered
+failure_cache = TTLCache(maxsize=256, ttl=600)
+news_cache_lock = threading.RLock()
+# Lookup outcomes since startup, reported by /cache/stats
+cache_counters = {'hits': 0, 'misses': 0}
+
+# Per-country cache generation; bumping it orphans every cached entry for
+# that country without scanning the cache. With Redis the counter lives there
+# (under REVISION_KEY_PREFIX) so every worker sees it, and it is part of the
+# Redis key, so a build that was in flight during an invalidation can only
+# write to a key nobody reads any more.
+cache_revisions = defaultdict(int)
+REVISION_KEY_PREFIX = 'news-revision:'
+# Revisions read from Redis are reused for a few seconds so cache hits don't
+# each pay a Redis round trip; other workers notice an invalidation within this
+revision_cache = TTLCache(maxsize=1024, ttl=5)
+
+# Parsed RSS articles per feed URL, so a summary cache miss doesn't also
+# have to wait on the feed
+rss_cache = TTLCache(maxsize=64, ttl=300)
+rss_cache_lock = threading.Lock()
+
+# Validators from the last successful fetch of each feed URL:
+# url -> (etag, last_modified, articles), used for conditional GETs
+feed_meta = {}
+
+# Two worker pools, so a task never waits on work queued behind it in its own
+# pool: executor runs the hedged AI providers and other tasks that fan out,
+# http_executor runs single upstream calls that never wait on another
+# future. Under gunicorn's gevent worker these threads are greenlets.
+UPSTREAM_WORKERS = int(os.environ.get("UPSTREAM_WORKERS", 256))
+executor = ThreadPoolExecutor(max_workers=UPSTREAM_WORKERS)
+http_executor = ThreadPoolExecutor(max_workers=UPSTREAM_WORKERS)
+
+# (connect, read) timeouts so an unreachable provider fails fast
+UPSTREAM_TIMEOUT = (3.05, 27)
+# Longest a fan-out waits for its upstream calls before giving up on them
+FAN_OUT_DEADLINE = 30
+
+def first_result(futures, timeout=FAN_OUT_DEADLINE):
+    """Return the first truthy future result, cancelling the rest"""
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            result = future.result()
+            if result:
+                return result
+    except TimeoutError:
+        log.warning("No upstream answer within %ss", timeout)
+    finally:
+        for pending in futures:
+            pending.cancel()
+    return None
+
+# Summaries currently being built, so concurrent identical misses wait for
+# the first request instead of each calling the AI providers
+inflight = {}
+inflight_lock = threading.Lock()
+# A full build (feeds, the provider race, translation) can outlast this; callers
+# still waiting then get on_timeout's degraded answer rather than an error
+INFLIGHT_WAIT = 45
+
+def single_flight(key, compute, on_timeout=None):
+    """Run compute once per key at a time; concurrent callers share its result
+    
+    A caller that waits more than INFLIGHT_WAIT for the running compute gets
+    on_timeout() instead, or TimeoutError if there is none.
+    """
+    with inflight_lock:
+        future = inflight.get(key)
+        leader = future is None
+        if leader:
+            future = inflight[key] = Future()
+    if not leader:
+        try:
+            return future.result(timeout=INFLIGHT_WAIT)
+        except TimeoutError:
+            if on_timeout is None:
+                raise
+            log.warning("Gave up waiting %ss for an in-flight build", INFLIGHT_WAIT)
+            return on_timeout()
+    
+    try:
+        result = compute()
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with inflight_lock:
+            inflight.pop(key, None)
+
+def make_session(headers=None, retries=0):
+    """Build a keep-alive session so upstream TLS handshakes are reused"""
+    session = requests.Session()
+    session.headers.update({"User-Agent": "newsapp/1.0", "Accept-Encoding": "gzip, deflate"})
+    # Only GETs are retried: a repeated POST is a second billed call. Retry-After
+    # is ignored so a rate-limited host can't stall a request for long
+    retry = Retry(total=retries, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504],
+                  allowed_methods=['GET'], raise_on_status=False,
+                  respect_retry_after_header=False)
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=64, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
 
-# Cache for news responses
-news_cache = {}
+# One pooled session per upstream host, with auth headers set once. AI
+# providers bill per call and the hedged race already covers one failing,
+# so their sessions keep the default of no retries
+huggingface_session = make_session(
+    {"Authorization": f"Bearer {HUGGINGFACE_API_KEY}", "Content-Type": "application/json"}
+    if HUGGINGFACE_API_KEY else None)
+# Groq keys rotate per request, so each gets a prebuilt Authorization header
+GROQ_AUTH_HEADERS = tuple({"Authorization": f"Bearer {key}"} for key in GROQ_API_KEYS)
+# Groq speaks HTTP/2, so concurrent summaries share one multiplexed TLS
+# connection instead of each holding a pooled HTTP/1.1 socket
+groq_client = httpx.Client(
+    headers={"User-Agent": "newsapp/1.0", "Content-Type": "application/json"},
+    timeout=httpx.Timeout(UPSTREAM_TIMEOUT[1], connect=UPSTREAM_TIMEOUT[0]),
+    # retries here cover connection failures; the hedged providers cover the rest
+    transport=httpx.HTTPTransport(
+        http2=True, retries=2,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)))
+fallback_session = make_session({"Content-Type": "application/json"})
+# Feeds are plain GETs, so a flaky publisher gets a couple more tries
+feed_session = make_session(retries=2)
+translate_session = make_session()
+
+def warm_upstream_connections():
+    """Resolve DNS and open TLS connections to the AI providers before the
+    first request needs them"""
+    if GROQ_API_KEY:
+        try:
+            groq_client.get("https://api.groq.com/openai/v1/models",
+                            headers=GROQ_AUTH_HEADERS[0], timeout=5)
+        except httpx.HTTPError as e:
+            log.warning("Groq warmup failed: %s", e)
+    if HUGGINGFACE_API_KEY:
+        try:
+            huggingface_session.head("https://api-inference.huggingface.co", timeout=5)
+        except requests.RequestException as e:
+            log.warning("HuggingFace warmup failed: %s", e)
+
+def start_background_threads():
+    """Start this process's log writer and connection warmup threads"""
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    threading.Thread(target=warm_upstream_connections, daemon=True).start()
+
+# gunicorn starts them in each worker from its post_worker_init hook, so a
+# preloaded master never holds threads or sockets that its forks inherit
+if not os.environ.get('SERVER_SOFTWARE', '').startswith('gunicorn'):
+    start_background_threads()
 
 # RSS Feeds by country/category
-RSS_FEEDS = {
+RSS_FEEDS = MappingProxyType({
     'global': 'http://feeds.bbci.co.uk/news/rss.xml',
     'us': 'https://feeds.npr.org/1001/rss.xml',
     'uk': 'http://feeds.bbci.co.uk/news/rss.xml',
@@ -39,52 +283,360 @@ RSS_FEEDS = {
     'business': 'https://feeds.reuters.com/reuters/businessNews',
     'science': 'https://feeds.feedburner.com/sciencealert-latestnews',
     'health': 'https://feeds.feedburner.com/medicalnewstoday',
-}
+})
 
-def get_cache_key(country, topic, language):
-    return f"{country}_{topic}_{language}_{datetime.now().strftime('%Y%m%d%H')}"
+# Hugging Face models, tried in order
+HUGGINGFACE_MODELS = (
+    "mistralai/Mistral-7B-Instruct-v0.2",
+    "meta-llama/Meta-Llama-3-8B-Instruct",
+    "google/flan-t5-xxl",
+)
 
-def get_rss_feed(country, topic):
-    """Fetch RSS feed based on country and topic"""
+# Free OpenAI-compatible endpoints used as a last resort
+FALLBACK_AI_ENDPOINTS = (
+    "https://api.deepinfra.com/v1/openai/chat/completions",
+    "https://free.churchless.tech/v1/chat/completions",
+)
+
+# [minute, formatted] pair so strftime runs at most once a minute
+_minute_stamp = [None, '']
+
+def minute_timestamp():
+    """Current local time as 'YYYY-MM-DD HH:MM', reformatted once per minute"""
+    minute = int(time.time()) // 60
+    if _minute_stamp[0] != minute:
+        _minute_stamp[1] = time.strftime('%Y-%m-%d %H:%M', time.localtime(minute * 60))
+        _minute_stamp[0] = minute
+    return _minute_stamp[1]
+
+# [second, formatted] pair for response timestamps, which only need
+# second resolution
+_second_stamp = [None, '']
+
+def iso_timestamp():
+    """Current local time in ISO format, reformatted at most once a second"""
+    second = int(time.time())
+    if _second_stamp[0] != second:
+        _second_stamp[1] = datetime.fromtimestamp(second).isoformat()
+        _second_stamp[0] = second
+    return _second_stamp[1]
+
+# Spellings of the same country or topic that should share a cache entry
+# and feed; keys are already lower-cased and space-collapsed
+NAME_ALIASES = MappingProxyType({
+    'usa': 'us',
+    'u.s.': 'us',
+    'america': 'us',
+    'united states': 'us',
+    'united states of america': 'us',
+    'united kingdom': 'uk',
+    'britain': 'uk',
+    'great britain': 'uk',
+    'england': 'uk',
+    'tech': 'technology',
+    'sport': 'sports',
+    'world': 'global',
+})
+
+def canonical_name(name):
+    """Collapse case, spacing and common aliases so equivalent requests match"""
+    name = ' '.join(name.lower().split())
+    return NAME_ALIASES.get(name, name)
+
+# How aliased names are written in prompts, so every spelling that shares a
+# cache entry also gets the same summary
+DISPLAY_NAMES = MappingProxyType({
+    'us': 'United States',
+    'uk': 'United Kingdom',
+    'technology': 'Technology',
+    'sports': 'Sports',
+    'global': 'Global',
+})
+
+def display_name(name):
+    """Name to write in generated text for a country or topic"""
+    return DISPLAY_NAMES.get(canonical_name(name), name)
+
+def with_caller_names(body, country, topic):
+    """Echo the caller's own country and topic in a shared cached body
+    
+    The body is only re-encoded when it was stored under another spelling.
+    """
+    if (b'"country":' + orjson.dumps(country) in body
+            and b'"topic":' + orjson.dumps(topic) in body):
+        return body
+    data = orjson.loads(body)
+    data['country'] = country
+    data['topic'] = topic
+    return orjson.dumps(data)
+
+CACHE_KEY_SEPARATOR = '|'
+
+def get_cache_key(country, topic, language, translated=False):
+    # Translated and untranslated responses for a language carry different bodies
+    parts = [canonical_name(country), canonical_name(topic), language]
+    if translated:
+        parts.append('translated')
+    return CACHE_KEY_SEPARATOR.join(parts)
+
+def cache_revision(country):
+    """Current cache generation for a country"""
+    name = canonical_name(country)
+    if redis_client is None:
+        return cache_revisions.get(name, 0)
+    with news_cache_lock:
+        revision = revision_cache.get(name)
+    if revision is not None:
+        return revision
+    
+    # While Redis is unreachable the local revision is held just as briefly,
+    # so requests don't each wait out a socket timeout first
     try:
-        # Map country to feed
-        feed_key = country.lower().replace(' ', '_')
-        if feed_key not in RSS_FEEDS:
-            # Try topic-based feed
-            topic_key = topic.lower().replace(' ', '_')
-            if topic_key in RSS_FEEDS:
-                feed_url = RSS_FEEDS[topic_key]
-            else:
-                feed_url = RSS_FEEDS['global']
+        raw = redis_client.get(REVISION_KEY_PREFIX + name)
+        revision = int(raw) if raw is not None else 0
+    except redis.RedisError as e:
+        log.warning("Redis read error: %s", e)
+        revision = cache_revisions.get(name, 0)
+    with news_cache_lock:
+        revision_cache[name] = revision
+    return revision
+
+def redis_cache_key(cache_key, revision):
+    """Redis key for a cache entry at a given revision"""
+    return f"{REDIS_KEY_PREFIX}{cache_key}#{revision}"
+
+def cache_lookup(cache_key, revision):
+    """Check the in-process cache, then Redis, promoting Redis hits locally
+    
+    Returns (JSON body as bytes, whether it is a cached failure), with a body
+    of None on a miss.
+    """
+    with news_cache_lock:
+        cached = news_cache.get((cache_key, revision))
+        failed = cached is None and (cache_key, revision) in failure_cache
+        if failed:
+            cached = failure_cache[(cache_key, revision)]
+        if cached is not None or redis_client is None:
+            cache_counters['hits' if cached is not None else 'misses'] += 1
+            return cached, failed
+    
+    try:
+        raw = redis_client.get(redis_cache_key(cache_key, revision))
+    except redis.RedisError as e:
+        log.warning("Redis read error: %s", e)
+        raw = None
+    
+    with news_cache_lock:
+        if raw is None:
+            cache_counters['misses'] += 1
+            return None, False
+        cache_counters['hits'] += 1
+        news_cache[(cache_key, revision)] = raw
+    return raw, False
+
+# Topics asking for the very latest news are always generated fresh
+TIME_SENSITIVE_WORDS = frozenset({'today', 'now', 'live'})
+
+def is_time_sensitive(cache_key):
+    """Whether the topic part of a cache key asks for up-to-the-minute news"""
+    topic = cache_key.split(CACHE_KEY_SEPARATOR)[1]
+    return not TIME_SENSITIVE_WORDS.isdisjoint(topic.split())
+
+def cache_store(cache_key, revision, body):
+    """Store a good serialized response locally and in Redis"""
+    if is_time_sensitive(cache_key):
+        return
+    with news_cache_lock:
+        news_cache[(cache_key, revision)] = body
+    if redis_client is not None:
+        # Other workers only need the entry eventually; don't hold up the response
+        http_executor.submit(redis_store, redis_cache_key(cache_key, revision), body)
+
+def redis_store(key, value, ttl=NEWS_CACHE_TTL):
+    """Write a cache entry to Redis, logging rather than raising on failure"""
+    try:
+        redis_client.setex(key, ttl, value)
+    except redis.RedisError as e:
+        log.warning("Redis write error: %s", e)
+
+def cache_failure(cache_key, revision, body):
+    """Remember a failed lookup locally for a short while"""
+    with news_cache_lock:
+        failure_cache[(cache_key, revision)] = body
+
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+FEED_TITLE_PARENTS = ('channel', ATOM_NS + 'feed')
+
+def _text(element, path):
+    """Stripped text of a child element, or '' when it is missing"""
+    return (element.findtext(path) or '').strip()
+
+@dataclass(slots=True, frozen=True)
+class Article:
+    """One feed entry; slotted since every fetch allocates a handful"""
+    title: str
+    summary: str
+    summary_trunc: str
+    link: str
+    published: str
+    source: str
+
+def _rss_article(item, source):
+    title = _text(item, 'title')
+    summary = _text(item, 'description') or title
+    return Article(
+        title=title,
+        summary=summary,
+        summary_trunc=summary[:200],
+        link=_text(item, 'link'),
+        published=_text(item, 'pubDate'),
+        source=source
+    )
+
+def _atom_article(entry, source):
+    title = _text(entry, ATOM_NS + 'title')
+    link = entry.find(ATOM_NS + 'link')
+    summary = _text(entry, ATOM_NS + 'summary') or _text(entry, ATOM_NS + 'content') or title
+    return Article(
+        title=title,
+        summary=summary,
+        summary_trunc=summary[:200],
+        link=link.get('href', '') if link is not None else '',
+        published=_text(entry, ATOM_NS + 'published') or _text(entry, ATOM_NS + 'updated'),
+        source=source
+    )
+
+def parse_feed_items(body, limit=8):
+    """Stream the first few RSS items or Atom entries out of a feed with lxml"""
+    articles = []
+    source = 'News Feed'
+    for _, element in etree.iterparse(BytesIO(body), events=('end',), resolve_entities=False,
+                                      no_network=True, huge_tree=False):
+        tag = element.tag
+        if tag == 'item':
+            articles.append(_rss_article(element, source))
+        elif tag == ATOM_NS + 'entry':
+            articles.append(_atom_article(element, source))
         else:
-            feed_url = RSS_FEEDS[feed_key]
-        
-        print(f"Fetching RSS from: {feed_url}")
-        feed = feedparser.parse(feed_url)
+            # The channel/feed title precedes the items and names the source
+            if tag in ('title', ATOM_NS + 'title') and not articles:
+                parent = element.getparent()
+                if parent is not None and parent.tag in FEED_TITLE_PARENTS and element.text:
+                    source = element.text.strip()
+            continue
         
-        articles = []
-        for entry in feed.entries[:8]:  # Get 8 articles
-            articles.append({
-                'title': entry.title,
-                'summary': entry.get('summary', entry.title),
-                'link': entry.link,
-                'published': entry.get('published', ''),
-                'source': feed.feed.get('title', 'News Feed')
-            })
+        element.clear()
+        if len(articles) >= limit:
+            break
+    
+    return articles
+
+# feedparser pulls in a large tree of parsers and sanitizers and is only
+# needed for feeds lxml rejects, so it is imported on first use
+_feedparser = None
+
+def parse_feed_with_feedparser(body, limit=8):
+    """Slower, more forgiving parse for feeds lxml cannot read"""
+    global _feedparser
+    if _feedparser is None:
+        import feedparser as _feedparser
+    feed = _feedparser.parse(body)
+    source = feed.feed.get('title', 'News Feed')
+    articles = []
+    for entry in feed.entries[:limit]:
+        summary = entry.get('summary', entry.get('title', ''))
+        articles.append(Article(
+            title=entry.get('title', ''),
+            summary=summary,
+            summary_trunc=summary[:200],
+            link=entry.get('link', ''),
+            published=entry.get('published', ''),
+            source=source
+        ))
+    return articles
+
+def feed_urls_for(country, topic):
+    """Feeds matching the country and/or topic, or the global feed"""
+    urls = []
+    for name in (canonical_name(country), canonical_name(topic)):
+        url = RSS_FEEDS.get(name.replace(' ', '_'))
+        if url and url not in urls:
+            urls.append(url)
+    return urls or [RSS_FEEDS['global']]
+
+def fetch_feed(feed_url):
+    """Fetch and parse one feed, reusing the parsed articles for a few minutes"""
+    with rss_cache_lock:
+        cached = rss_cache.get(feed_url)
+    if cached is not None:
+        return cached
+    
+    headers = {}
+    meta = feed_meta.get(feed_url)
+    if meta:
+        etag, last_modified, _ = meta
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+    
+    try:
+        log.debug("Fetching RSS from: %s", feed_url)
+        response = feed_session.get(feed_url, headers=headers, timeout=(2, 5))
+        if response.status_code == 304 and meta:
+            # Unchanged since the last fetch: reuse what we parsed then
+            articles = meta[2]
+            with rss_cache_lock:
+                rss_cache[feed_url] = articles
+            return articles
+        response.raise_for_status()
         
-        return articles
+        try:
+            articles = parse_feed_items(response.content)
+        except etree.XMLSyntaxError as e:
+            log.info("lxml could not parse %s (%s), falling back to feedparser", feed_url, e)
+            articles = []
+        articles = articles or parse_feed_with_feedparser(response.content)
     except Exception as e:
-        print(f"RSS Error: {e}")
+        log.warning("RSS Error (%s): %s", feed_url, e)
         return []
-
-def generate_ai_summary(articles, country, topic, language):
-    """Generate AI summary using available providers"""
     
-    # Prepare prompt
-    articles_text = "\n".join([f"{i+1}. {a['title']} - {a['summary'][:200]}..." 
-                              for i, a in enumerate(articles)])
+    if articles:
+        with rss_cache_lock:
+            rss_cache[feed_url] = articles
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            feed_meta[feed_url] = (etag, last_modified, articles)
+    return articles
+
+def get_rss_feed(country, topic):
+    """Fetch RSS articles for a country and topic, merging matching feeds"""
+    urls = feed_urls_for(country, topic)
+    if len(urls) == 1:
+        return fetch_feed(urls[0])[:8]
     
-    prompt = f"""As a professional journalist, create a news summary about {topic} in {country}.
+    # Country and topic feeds both match: fetch them in parallel and
+    # interleave, dropping stories that appear in more than one
+    articles = []
+    seen_titles = set()
+    for group in zip_longest(*http_executor.map(fetch_feed, urls)):
+        for article in group:
+            if article is not None and article.title not in seen_titles:
+                seen_titles.add(article.title)
+                articles.append(article)
+    return articles[:8]
+
+LANGUAGE_NAMES = MappingProxyType({'ar': 'Arabic', 'ku': 'Kurdish'})
+LANGUAGE_DIRECTIVES = MappingProxyType({
+    name: f"Write in {name} language." for name in ('English', *LANGUAGE_NAMES.values())
+})
+
+def language_name(code):
+    """Map a client language code to the name used in AI prompts"""
+    return LANGUAGE_NAMES.get(code, 'English')
+
+NEWS_PROMPT_TEMPLATE = """As a professional journalist, create a news summary about {topic} in {country}.
 
 Recent Headlines:
 {articles_text}
@@ -97,273 +649,837 @@ Please write a comprehensive news report including:
 5. Future implications
 
 Write in a neutral, factual tone.
-{"Write in " + language + " language." if language != 'en' else ''}
+{language_directive}
 
 Format your response clearly with sections."""
+
+def build_news_prompt(articles, country, topic, language):
+    """Build the journalist prompt from the fetched headlines"""
+    return _build_news_prompt(tuple(articles), display_name(country), display_name(topic),
+                              language)
+
+# Articles are frozen and the feeds are cached for minutes, so the same
+# prompt is rebuilt often; reusing the same string object also makes the
+# encode_prompt lookup cheap
+@lru_cache(maxsize=512)
+def _build_news_prompt(articles, country, topic, language):
+    return NEWS_PROMPT_TEMPLATE.format_map({
+        'country': country,
+        'topic': topic,
+        'articles_text': "\n".join(f"{i}. {a.title} - {a.summary_trunc}..."
+                                    for i, a in enumerate(articles, 1)),
+        'language_directive': LANGUAGE_DIRECTIVES.get(language, '')
+    })
+
+def generate_ai_summary(articles, country, topic, language):
+    """Generate AI summary by racing providers with staggered (hedged) starts
+    
+    Returns (summary, name of the provider that produced it).
+    """
+    prompt = build_news_prompt(articles, country, topic, language)
+    # Requests that differ only in what happens after generation (translation,
+    # streaming fallback) still produce the same prompt; race it only once
+    return single_flight(('summary', prompt), lambda: race_providers(prompt),
+                         lambda: (SUMMARY_UNAVAILABLE, None))
+
+def race_providers(prompt):
+    """Race SUMMARY_HEDGES for one prompt; returns (summary, provider name)
+    
+    Each hedge is only submitted once its delay is up, so a waiting hedge
+    doesn't hold a worker slot.
+    """
+    start = time.monotonic()
+    deadline = start + SUMMARY_DEADLINE
+    waiting = list(SUMMARY_HEDGES)
+    futures = {}
+    try:
+        while waiting or futures:
+            now = time.monotonic()
+            while waiting and start + waiting[0][2] <= now:
+                name, provider, _ = waiting.pop(0)
+                futures[executor.submit(provider, prompt)] = name
+            if now >= deadline:
+                log.warning("No AI provider answered within %ss", SUMMARY_DEADLINE)
+                break
+            next_start = start + waiting[0][2] if waiting else deadline
+            done, _ = wait(futures, timeout=min(next_start, deadline) - now,
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                name = futures.pop(future)
+                text = future.result()
+                if text:
+                    return text, name
+                # A provider gave up: start the remaining hedges now
+                for name, provider, _ in waiting:
+                    futures[executor.submit(provider, prompt)] = name
+                waiting.clear()
+    finally:
+        for future in futures:
+            future.cancel()
     
-    # Try different AI providers in order
-    ai_response = try_huggingface(prompt)
-    if not ai_response:
-        ai_response = try_groq(prompt)
-    if not ai_response:
-        ai_response = try_fallback_ai(prompt)
+    return SUMMARY_UNAVAILABLE, None
+
+@lru_cache(maxsize=64)
+def encode_prompt(prompt):
+    """JSON-encode a prompt once; every hedged provider splices in the same bytes"""
+    return orjson.dumps(prompt)
+
+def splice_prompt(template, prompt):
+    """Fill the "__PROMPT__" placeholder of a pre-encoded request body"""
+    return template.replace(b'"__PROMPT__"', encode_prompt(prompt), 1)
+
+HUGGINGFACE_MODEL_URLS = tuple(f"https://api-inference.huggingface.co/models/{model}"
+                               for model in HUGGINGFACE_MODELS)
+
+# Same body for every model; only the prompt is spliced in per request
+HUGGINGFACE_BODY_TEMPLATE = orjson.dumps({
+    "inputs": "__PROMPT__",
+    "parameters": {
+        "max_new_tokens": 800,
+        "temperature": 0.7,
+        "top_p": 0.9
+    }
+})
+
+def query_huggingface_model(model_url, body):
+    """Query a single Hugging Face model with a pre-encoded request body"""
+    try:
+        response = huggingface_session.post(
+            model_url,
+            data=body,
+            timeout=UPSTREAM_TIMEOUT
+        )
+        
+        if response.status_code == 200:
+            result = orjson.loads(response.content)
+            if isinstance(result, list) and len(result) > 0:
+                text = result[0].get('generated_text', '')
+                if text:
+                    log.debug("HuggingFace success with %s", model_url)
+                    return text
+    except Exception as e:
+        log.warning("HuggingFace %s error: %s", model_url, e)
     
-    return ai_response or "News analysis currently unavailable. Please check back soon."
+    return None
 
 def try_huggingface(prompt):
-    """Try Hugging Face Inference API"""
+    """Try Hugging Face models concurrently, first answer wins"""
     if not HUGGINGFACE_API_KEY:
         return None
     
+    body = splice_prompt(HUGGINGFACE_BODY_TEMPLATE, prompt)
+    return first_result([http_executor.submit(query_huggingface_model, model_url, body)
+                         for model_url in HUGGINGFACE_MODEL_URLS])
+
+GROQ_CHAT_URL = "https://api.groq.com/openai/v1/chat/completions"
+
+# Cap on simultaneous Groq calls from this process. Bursts past it wait
+# briefly for a slot instead of running into Groq's rate limit, and give up
+# after GROQ_SLOT_TIMEOUT so the hedged providers can answer instead.
+# Groq's limits are per key, so the default allows 32 calls per key
+GROQ_MAX_CONCURRENCY = int(os.environ.get("GROQ_MAX_CONCURRENCY",
+                                          32 * max(len(GROQ_API_KEYS), 1)))
+GROQ_SLOT_TIMEOUT = 2.0
+groq_slots = threading.BoundedSemaphore(GROQ_MAX_CONCURRENCY)
+
+# monotonic time until which each key is resting after a 429
+groq_key_cooldowns = [0.0] * len(GROQ_API_KEYS)
+_groq_key_turns = count()
+# Longest a rate-limited key is rested, whatever Retry-After asks for
+GROQ_KEY_MAX_COOLDOWN = 60
+
+def next_groq_key():
+    """Index of the next Groq key in rotation that isn't rate limited, or None"""
+    now = time.monotonic()
+    for _ in GROQ_API_KEYS:
+        index = next(_groq_key_turns) % len(GROQ_API_KEYS)
+        if groq_key_cooldowns[index] <= now:
+            return index
+    return None
+
+def rest_groq_key(index, response_headers):
+    """Take a key out of rotation for as long as Groq's 429 asks"""
     try:
-        headers = {"Authorization": f"Bearer {HUGGINGFACE_API_KEY}"}
-        
-        # Try different models
-        models = [
-            "mistralai/Mistral-7B-Instruct-v0.2",
-            "meta-llama/Meta-Llama-3-8B-Instruct",
-            "google/flan-t5-xxl"
-        ]
-        
-        for model in models:
-            try:
-                response = requests.post(
-                    f"https://api-inference.huggingface.co/models/{model}",
-                    headers=headers,
-                    json={
-                        "inputs": prompt,
-                        "parameters": {
-                            "max_new_tokens": 800,
-                            "temperature": 0.7,
-                            "top_p": 0.9
-                        }
-                    },
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    if isinstance(result, list) and len(result) > 0:
-                        text = result[0].get('generated_text', '')
-                        if text:
-                            print(f"HuggingFace success with {model}")
-                            return text
-            except:
-                continue
-        
-        return None
-    except Exception as e:
-        print(f"HuggingFace error: {e}")
-        return None
+        delay = min(float(response_headers.get('retry-after', 10)), GROQ_KEY_MAX_COOLDOWN)
+    except ValueError:
+        delay = 10
+    groq_key_cooldowns[index] = time.monotonic() + delay
+    log.warning("Groq key #%d rate limited, resting it for %ss", index + 1, delay)
+
+GROQ_SYSTEM_MESSAGE = {"role": "system", "content": "You are a professional journalist."}
+
+GROQ_MODEL = "llama-3.1-70b-versatile"
+# Smaller, much faster model raced against the main one when it is slow
+GROQ_INSTANT_MODEL = "llama-3.1-8b-instant"
+
+def _groq_body_template(model, stream, max_tokens):
+    """Pre-encoded Groq request body with a placeholder for the user prompt"""
+    return orjson.dumps({
+        "model": model,
+        "messages": [GROQ_SYSTEM_MESSAGE, {"role": "user", "content": "__PROMPT__"}],
+        "temperature": 0.4,
+        "max_tokens": max_tokens,
+        "stream": stream
+    })
+
+GROQ_BODY_TEMPLATES = {
+    (GROQ_MODEL, False): _groq_body_template(GROQ_MODEL, False, 1000),
+    (GROQ_MODEL, True): _groq_body_template(GROQ_MODEL, True, 1000),
+    (GROQ_INSTANT_MODEL, False): _groq_body_template(GROQ_INSTANT_MODEL, False, 800),
+    (GROQ_INSTANT_MODEL, True): _groq_body_template(GROQ_INSTANT_MODEL, True, 800),
+}
+
+# Models Groq has told us are decommissioned; they are skipped from then on
+# so every request doesn't pay a failing round trip before the hedges start
+retired_groq_models = set()
+
+def note_retired_model(model, response_body):
+    """Remember a model if Groq's error body says it has been decommissioned"""
+    if b'decommissioned' in response_body and model not in retired_groq_models:
+        retired_groq_models.add(model)
+        log.warning("Groq model %s is decommissioned, skipping it from now on", model)
+
+def groq_body(prompt, stream=False, model=GROQ_MODEL):
+    """Encode a Groq chat completion request body by splicing in the prompt"""
+    return splice_prompt(GROQ_BODY_TEMPLATES[model, stream], prompt)
 
-def try_groq(prompt):
+def try_groq(prompt, model=GROQ_MODEL):
     """Try Groq API"""
-    if not GROQ_API_KEY:
+    if not GROQ_API_KEY or model in retired_groq_models:
+        return None
+    key = next_groq_key()
+    if key is None:
         return None
     
+    if not groq_slots.acquire(timeout=GROQ_SLOT_TIMEOUT):
+        log.warning("Groq busy, no slot for %s within %ss", model, GROQ_SLOT_TIMEOUT)
+        return None
     try:
-        headers = {
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "model": "llama-3.1-70b-versatile",
-            "messages": [
-                {"role": "system", "content": "You are a professional journalist."},
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": 0.4,
-            "max_tokens": 1000
-        }
-        
-        response = requests.post(
-            "https://api.groq.com/openai/v1/chat/completions",
-            headers=headers,
-            json=payload,
-            timeout=30
-        )
+        response = groq_client.post(GROQ_CHAT_URL, content=groq_body(prompt, model=model),
+                                    headers=GROQ_AUTH_HEADERS[key])
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             return data['choices'][0]['message']['content']
         
+        if response.status_code == 429:
+            rest_groq_key(key, response.headers)
+        note_retired_model(model, response.content)
         return None
     except Exception as e:
-        print(f"Groq error: {e}")
+        log.warning("Groq error (%s): %s", model, e)
         return None
+    finally:
+        groq_slots.release()
 
-def try_fallback_ai(prompt):
-    """Try free AI endpoints"""
-    endpoints = [
-        "https://api.deepinfra.com/v1/openai/chat/completions",
-        "https://free.churchless.tech/v1/chat/completions",
-    ]
+def try_groq_instant(prompt):
+    """Try Groq's fast model"""
+    return try_groq(prompt, GROQ_INSTANT_MODEL)
+
+def stream_groq(prompt):
+    """Yield Groq completion text chunks as they are generated
     
-    for endpoint in endpoints:
-        try:
-            response = requests.post(
-                endpoint,
-                json={
-                    "model": "gpt-3.5-turbo",
-                    "messages": [{"role": "user", "content": prompt}],
-                    "max_tokens": 600
-                },
-                timeout=20
-            )
+    The generator's return value is True only if Groq finished the completion.
+    """
+    if not GROQ_API_KEY:
+        return False
+    
+    model = GROQ_INSTANT_MODEL if GROQ_MODEL in retired_groq_models else GROQ_MODEL
+    key = next_groq_key()
+    if key is None:
+        return False
+    # The slot is held for the whole stream; closing the generator releases it
+    if not groq_slots.acquire(timeout=GROQ_SLOT_TIMEOUT):
+        log.warning("Groq busy, no slot for streaming within %ss", GROQ_SLOT_TIMEOUT)
+        return False
+    try:
+        with groq_client.stream('POST', GROQ_CHAT_URL,
+                                content=groq_body(prompt, stream=True, model=model),
+                                headers=GROQ_AUTH_HEADERS[key]) as response:
+            if response.status_code != 200:
+                if response.status_code == 429:
+                    rest_groq_key(key, response.headers)
+                note_retired_model(model, response.read())
+                return False
             
-            if response.status_code == 200:
-                data = response.json()
-                if 'choices' in data:
-                    return data['choices'][0]['message']['content']
-        except:
-            continue
+            # Server-sent events: one "data: {...}" line per chunk
+            for line in response.iter_lines():
+                if not line.startswith('data: '):
+                    continue
+                chunk = line[6:]
+                if chunk == '[DONE]':
+                    return True
+                delta = orjson.loads(chunk)['choices'][0]['delta'].get('content')
+                if delta:
+                    yield delta
+    except Exception as e:
+        log.warning("Groq stream error: %s", e)
+    finally:
+        groq_slots.release()
+    return False
+
+def query_fallback_endpoint(endpoint, body):
+    """Query a single free AI endpoint with a pre-encoded request body"""
+    try:
+        response = fallback_session.post(endpoint, data=body, timeout=(3.05, 20))
+        
+        if response.status_code == 200:
+            data = orjson.loads(response.content)
+            if 'choices' in data:
+                return data['choices'][0]['message']['content']
+    except Exception:
+        pass
     
     return None
 
+FALLBACK_BODY_TEMPLATE = orjson.dumps({
+    "model": "gpt-3.5-turbo",
+    "messages": [{"role": "user", "content": "__PROMPT__"}],
+    "max_tokens": 600
+})
+
+def try_fallback_ai(prompt):
+    """Try free AI endpoints concurrently, first answer wins"""
+    body = splice_prompt(FALLBACK_BODY_TEMPLATE, prompt)
+    return first_result([http_executor.submit(query_fallback_endpoint, endpoint, body)
+                         for endpoint in FALLBACK_AI_ENDPOINTS])
+
+# (name, provider, start delay in seconds) for generate_ai_summary. Groq
+# answers fastest, so it goes first; the others are hedges, including
+# Groq's 8B model for when the 70B one is stuck in tail latency
+SUMMARY_HEDGES = (('Groq', try_groq, 0), ('HuggingFace', try_huggingface, 0.5),
+                  ('Fallback', try_fallback_ai, 2.0), ('Groq Instant', try_groq_instant, 3.0))
+# Longest the race waits for any provider; kept under INFLIGHT_WAIT so
+# requests sharing just the summary get its outcome
+SUMMARY_DEADLINE = 40
+SUMMARY_UNAVAILABLE = "News analysis currently unavailable. Please check back soon."
+
+GOOGLE_TRANSLATE_URL = "https://translation.googleapis.com/language/translate/v2"
+# Small chunks translate in parallel and repeat often enough (section
+# headings, boilerplate) to be worth caching individually
+TRANSLATE_CHUNK_CHARS = 1200
+TRANSLATE_KEY_PREFIX = 'translate:'
+# A paragraph's translation doesn't go stale, so keep it longer than summaries
+TRANSLATION_CACHE_TTL = 3600
+
+# Translated chunks keyed by (target language, chunk digest)
+translation_cache = TTLCache(maxsize=2048, ttl=TRANSLATION_CACHE_TTL)
+translation_cache_lock = threading.Lock()
+
+# Where a paragraph over the chunk limit is cut: after a sentence if
+# possible, otherwise between words
+SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+')
+WORD_BREAK = re.compile(r'\s+')
+
+def split_long_paragraph(paragraph, separator, limit):
+    """Cut a paragraph into (piece, following separator) pairs under the limit"""
+    pieces = []
+    while len(paragraph) > limit:
+        window = paragraph[:limit + 1]
+        cut = None
+        for pattern in (SENTENCE_BREAK, WORD_BREAK):
+            cut = next((match for match in reversed(list(pattern.finditer(window)))
+                        if match.start() > 0), None)
+            if cut is not None:
+                break
+        if cut is None:
+            pieces.append((paragraph[:limit], ''))
+            paragraph = paragraph[limit:]
+        else:
+            pieces.append((paragraph[:cut.start()], cut.group()))
+            paragraph = paragraph[cut.end():]
+    pieces.append((paragraph, separator))
+    return pieces
+
+def split_paragraphs(text, limit=TRANSLATE_CHUNK_CHARS):
+    """Group paragraphs into chunks under the per-request size limit
+    
+    Returns (chunk, separator) pairs; each chunk followed by its separator
+    rebuilds the text.
+    """
+    paragraphs = text.split('\n\n')
+    pieces = []
+    for index, paragraph in enumerate(paragraphs):
+        separator = '\n\n' if index < len(paragraphs) - 1 else ''
+        pieces.extend(split_long_paragraph(paragraph, separator, limit))
+    
+    chunks, current, joiner = [], None, ''
+    for piece, separator in pieces:
+        if current is not None and len(current) + len(joiner) + len(piece) > limit:
+            chunks.append((current, joiner))
+            current = None
+        current = piece if current is None else current + joiner + piece
+        joiner = separator
+    chunks.append((current, joiner))
+    return chunks
+
+# Client language codes that Google Translate knows under another name
+# ('ku' is Kurmanji there; our Kurdish readers use Sorani)
+GOOGLE_LANGUAGE_CODES = MappingProxyType({'ku': 'ckb'})
+
+# Circuit breaker: after this many consecutive failures Google Translate is
+# skipped for the cooldown, so an outage doesn't add a timeout to every
+# translated request
+TRANSLATE_BREAKER_FAILURES = 5
+TRANSLATE_BREAKER_COOLDOWN = 60
+translate_breaker = {'failures': 0, 'open_until': 0.0}
+
+def translate_breaker_open():
+    return time.monotonic() < translate_breaker['open_until']
+
+def google_translate(text, target_lang):
+    """Translate one chunk with the Google Translate v2 API"""
+    if translate_breaker_open():
+        raise RuntimeError("Google Translate skipped while its circuit breaker is open")
+    try:
+        response = translate_session.post(
+            GOOGLE_TRANSLATE_URL,
+            params={'key': GOOGLE_TRANSLATE_API_KEY},
+            data={'q': text, 'target': GOOGLE_LANGUAGE_CODES.get(target_lang, target_lang),
+                  'source': 'en', 'format': 'text'},
+            timeout=(3.05, 10)
+        )
+        response.raise_for_status()
+    except requests.RequestException:
+        translate_breaker['failures'] += 1
+        if translate_breaker['failures'] >= TRANSLATE_BREAKER_FAILURES:
+            translate_breaker['failures'] = 0
+            translate_breaker['open_until'] = time.monotonic() + TRANSLATE_BREAKER_COOLDOWN
+            log.warning("Google Translate failing, skipping it for %ss",
+                        TRANSLATE_BREAKER_COOLDOWN)
+        raise
+    translate_breaker['failures'] = 0
+    return orjson.loads(response.content)['data']['translations'][0]['translatedText']
+
+def translate_chunk(chunk, target_lang):
+    """Translate one chunk, checking the local cache and Redis first"""
+    digest = hashlib.blake2b(chunk.encode(), digest_size=16).hexdigest()
+    with translation_cache_lock:
+        cached = translation_cache.get((target_lang, digest))
+    if cached is not None:
+        return cached
+    
+    redis_key = f"{TRANSLATE_KEY_PREFIX}{target_lang}:{digest}"
+    if redis_client is not None:
+        try:
+            raw = redis_client.get(redis_key)
+            if raw is not None:
+                translated = raw.decode()
+                with translation_cache_lock:
+                    translation_cache[(target_lang, digest)] = translated
+                return translated
+        except redis.RedisError as e:
+            log.warning("Redis read error: %s", e)
+    
+    translated = google_translate(chunk, target_lang)
+    with translation_cache_lock:
+        translation_cache[(target_lang, digest)] = translated
+    if redis_client is not None:
+        http_executor.submit(redis_store, redis_key, translated, TRANSLATION_CACHE_TTL)
+    return translated
+
 def translate_text(text, target_lang):
-    """Simple translation using available services"""
+    """Translate the summary paragraph-chunk by chunk, in parallel
+    
+    Returns (text, whether it was translated); when it wasn't, the text is
+    the English original with a note, which must not be cached as a success.
+    """
     if target_lang == 'en' or not text:
-        return text
+        return text, True
     
-    # Try translation APIs
-    translation_apis = [
-        # Add translation API calls here if you have access
-        # Example: Google Translate, LibreTranslate, etc.
-    ]
+    # While the breaker is open every chunk would fail fast anyway
+    if not GOOGLE_TRANSLATE_API_KEY or translate_breaker_open():
+        return f"{text}\n\n[Translated from English to {target_lang}]", False
     
-    # For now, return original with note
-    return f"{text}\n\n[Translated from English to {target_lang}]"
+    try:
+        chunks = split_paragraphs(text)
+        if len(chunks) == 1:
+            return translate_chunk(text, target_lang), True
+        texts, separators = zip(*chunks)
+        translated = http_executor.map(translate_chunk, texts, [target_lang] * len(texts))
+        return ''.join(part + separator
+                       for part, separator in zip(translated, separators)), True
+    except Exception as e:
+        log.warning("Translation error (%s): %s", target_lang, e)
+        return f"{text}\n\n[Translated from English to {target_lang}]", False
+
+# Canned update served when the news pipeline fails
+FALLBACK_NEWS_TEMPLATE = """📢 **News Update for {country}**
+
+**Topic:** {topic}
+
+Due to high demand, our AI systems are processing your request.
+In the meantime, here are the latest developments:
+
+• Digital transformation continues across various sectors
+• New initiatives focus on sustainable development
+• Global partnerships strengthen economic ties
+• Innovation in technology drives progress
+
+For live updates, check major news outlets.
+
+*Last updated: {updated}*
+*Powered by AI News Assistant*"""
+
+def parse_json_body():
+    """Decode the request body with orjson, treating an empty body as {}"""
+    raw = request.get_data(cache=False)
+    return orjson.loads(raw) if raw else {}
+
+# Longest country and topic strings a news request may carry
+NEWS_FIELD_LIMITS = MappingProxyType({'country': 64, 'topic': 128})
+SUPPORTED_LANGUAGES = frozenset({'en', *LANGUAGE_NAMES})
+
+def news_request_error(data):
+    """Why a news request body is unusable, or None if it is well formed"""
+    if not isinstance(data, dict):
+        return 'body must be a JSON object'
+    for field, limit in NEWS_FIELD_LIMITS.items():
+        if field in data and not (isinstance(data[field], str) and len(data[field]) <= limit):
+            return f'{field} must be a string of at most {limit} characters'
+        # '|' separates the parts of a cache key, so it can't appear inside one
+        if CACHE_KEY_SEPARATOR in data.get(field, ''):
+            return f"{field} must not contain '{CACHE_KEY_SEPARATOR}'"
+    if not isinstance(data.get('needs_translation', False), bool):
+        return 'needs_translation must be a boolean'
+    language = data.get('original_language', 'en')
+    if not isinstance(language, str) or language not in SUPPORTED_LANGUAGES:
+        return f"original_language must be one of {', '.join(sorted(SUPPORTED_LANGUAGES))}"
+    return None
+
+# Query-string spellings of needs_translation for GET /get_news
+QUERY_BOOLEANS = MappingProxyType({'true': True, '1': True, 'false': False, '0': False})
+
+def parse_news_query():
+    """Read a GET /get_news query string, returning (data, error)"""
+    data = request.args.to_dict()
+    if 'needs_translation' in data:
+        flag = QUERY_BOOLEANS.get(data['needs_translation'].lower())
+        if flag is None:
+            return None, 'needs_translation must be true or false'
+        data['needs_translation'] = flag
+    return data, news_request_error(data)
+
+def parse_news_request():
+    """Decode and check a news request body, returning (data, error)"""
+    try:
+        data = parse_json_body()
+    except orjson.JSONDecodeError:
+        return None, 'body is not valid JSON'
+    return data, news_request_error(data)
+
+@lru_cache(maxsize=4096)
+def render_fallback_news(country, topic, updated):
+    """Render the canned update served when the news pipeline fails"""
+    return FALLBACK_NEWS_TEMPLATE.format(country=country, topic=topic, updated=updated)
+
+def build_news_response(country, topic, language, summary, provider, articles_count,
+                        cache_key, start_time, translated_summary=None):
+    """Response body for a generated news summary"""
+    return {
+        'description': summary,
+        'translated_description': translated_summary,
+        'success': True,
+        'country': country,
+        'topic': topic,
+        'language': language,
+        'articles_count': articles_count,
+        'cache_key': cache_key,
+        'processing_time': round(time.perf_counter() - start_time, 2),
+        'timestamp': iso_timestamp(),
+        'ai_providers_used': provider
+    }
 
-@app.route('/get_news', methods=['POST', 'OPTIONS'])
+# How long clients and edge caches may reuse a summary without asking again
+SUMMARY_MAX_AGE = 300
+
+def summary_response(body, cache_status, failed=False, live=False):
+    """Serve a summary body; GET responses get an ETag and may be cached
+    
+    Failed summaries are never marked cacheable: they are only kept here
+    briefly, and nobody downstream should keep serving an outage message.
+    Nor are live ones (time-sensitive topics), which are never cached here.
+    """
+    response = raw_json_response(body)
+    response.headers['X-Cache'] = cache_status
+    if failed or live:
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    # POST responses can't be reused by browsers or shared caches
+    if request.method not in ('GET', 'HEAD'):
+        return response
+    
+    etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+    # Compress tags the ETag of compressed responses as "<etag>:gzip" or "<etag>:br"
+    if request.if_none_match.star_tag or any(tag.partition(':')[0] == etag
+                                             for tag in request.if_none_match):
+        response = Response(status=304)
+        response.headers['X-Cache'] = cache_status
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'public, max-age={SUMMARY_MAX_AGE}'
+    return response
+
+def sse_event(payload):
+    """Encode one server-sent event"""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+def fallback_news_body(country, topic, language, error):
+    """Serialized canned update for when no summary can be served"""
+    return orjson.dumps({
+        'description': render_fallback_news(display_name(country), display_name(topic),
+                                            minute_timestamp()),
+        'translated_description': None,
+        'success': False,
+        'country': country,
+        'topic': topic,
+        'language': language,
+        'articles_count': 0,
+        'error': error,
+        'timestamp': iso_timestamp()
+    })
+
+def build_news(country, topic, original_language, needs_translation, cache_key, revision,
+               start_time):
+    """Fetch, summarize and cache one news response
+    
+    Returns (JSON body, whether it is a failure rather than a summary).
+    """
+    # Step 1: Fetch real news
+    articles = get_rss_feed(country, topic)
+    
+    if not articles:
+        # Nothing for the AI to summarize, so skip the upstream round trip
+        log.warning("No articles for %s | %s, serving fallback update", country, topic)
+        body = fallback_news_body(country, topic, original_language,
+                                  'No news sources available')
+        cache_failure(cache_key, revision, body)
+        return body, True
+    
+    # Step 2: Generate AI summary
+    log.debug("🤖 Generating AI summary...")
+    ai_summary, ai_provider = generate_ai_summary(articles, country, topic,
+                                                  language_name(original_language))
+    
+    # Step 3: Translate if needed
+    translated_summary, translated = None, True
+    if needs_translation and original_language != 'en':
+        log.debug("🔄 Translating to %s...", original_language)
+        translated_summary, translated = translate_text(ai_summary, original_language)
+    
+    # Step 4: Prepare response
+    response_data = build_news_response(country, topic, original_language, ai_summary,
+                                        ai_provider, len(articles), cache_key, start_time,
+                                        translated_summary)
+    
+    # Cache the response; an untranslated fallback only briefly, like a
+    # failed summary, so the next request tries the translation again
+    body = orjson.dumps(response_data)
+    failed = ai_provider is None or not translated
+    if failed:
+        cache_failure(cache_key, revision, body)
+    else:
+        cache_store(cache_key, revision, body)
+    
+    log.info("✅ Response ready (%ss)", response_data['processing_time'])
+    return body, failed
+
+# GET takes the same fields as query parameters and is the cacheable form:
+# browsers and shared caches can reuse it and revalidate with If-None-Match
+@app.route('/get_news', methods=['GET', 'POST', 'OPTIONS'])
 def get_news():
     if request.method == 'OPTIONS':
-        return jsonify({'status': 'ok'}), 200
-    
+        return '', 204
+
+    # Reject malformed requests before they cost an upstream AI call
+    if request.method == 'POST':
+        data, error = parse_news_request()
+    else:
+        data, error = parse_news_query()
+    if error:
+        return json_response({'success': False, 'error': error}, 400)
+
     try:
-        start_time = time.time()
-        data = request.get_json()
-        
+        start_time = time.perf_counter()
         country = data.get('country', 'Global')
         topic = data.get('topic', 'Breaking News')
         original_language = data.get('original_language', 'en')
-        needs_translation = data.get('needs_translation', False)
+        needs_translation = data.get('needs_translation', False) and original_language != 'en'
         
-        print(f"\n📡 News Request:")
-        print(f"   Country: {country}")
-        print(f"   Topic: {topic}")
-        print(f"   Language: {original_language}")
-        print(f"   Needs translation: {needs_translation}")
+        log.info("📡 News request: country=%s topic=%s language=%s translate=%s",
+                 country, topic, original_language, needs_translation)
         
         # Check cache
-        cache_key = get_cache_key(country, topic, original_language)
-        if cache_key in news_cache:
-            cache_age = datetime.now() - news_cache[cache_key]['timestamp']
-            if cache_age < timedelta(minutes=30):  # Cache for 30 minutes
-                print("   ✅ Serving from cache")
-                return jsonify(news_cache[cache_key]['response'])
-        
-        # Step 1: Fetch real news
-        articles = get_rss_feed(country, topic)
+        cache_key = get_cache_key(country, topic, original_language, needs_translation)
+        revision = cache_revision(country)
+        cached, failed = cache_lookup(cache_key, revision)
+        if cached is not None:
+            log.debug("✅ Serving from cache")
+            return summary_response(with_caller_names(cached, country, topic), 'HIT', failed,
+                                    is_time_sensitive(cache_key))
         
-        if not articles:
-            # Fallback articles
-            articles = [
-                {
-                    'title': f'Latest developments in {country}',
-                    'summary': f'Recent updates on {topic.lower()} from various sources',
-                    'source': 'AI News Assistant',
-                    'published': datetime.now().strftime('%Y-%m-%d')
-                }
-            ]
+        # Concurrent misses for the same key share one upstream round trip
+        body, failed = single_flight(
+            (cache_key, revision),
+            lambda: build_news(country, topic, original_language, needs_translation,
+                               cache_key, revision, start_time),
+            lambda: (fallback_news_body(country, topic, original_language,
+                                        'Summary is taking longer than usual'), True))
+        return summary_response(with_caller_names(body, country, topic), 'MISS', failed,
+                                is_time_sensitive(cache_key))
         
-        # Step 2: Generate AI summary
-        print("   🤖 Generating AI summary...")
-        ai_summary = generate_ai_summary(articles, country, topic, 
-                                        'Arabic' if original_language == 'ar' else 
-                                        'Kurdish' if original_language == 'ku' else 'English')
-        
-        # Step 3: Translate if needed
-        translated_summary = None
-        if needs_translation and original_language != 'en':
-            print(f"   🔄 Translating to {original_language}...")
-            translated_summary = translate_text(ai_summary, original_language)
-        
-        # Step 4: Prepare response
-        response_data = {
-            'description': ai_summary,
-            'translated_description': translated_summary,
-            'success': True,
-            'country': country,
-            'topic': topic,
-            'language': original_language,
-            'articles_count': len(articles),
-            'cache_key': cache_key,
-            'processing_time': round(time.time() - start_time, 2),
-            'timestamp': datetime.now().isoformat(),
-            'ai_providers_used': 'HuggingFace/Groq/Fallback'
-        }
+    except Exception as e:
+        log.exception("❌ Error: %s", e)
         
-        # Cache the response
-        news_cache[cache_key] = {
-            'timestamp': datetime.now(),
-            'response': response_data
-        }
+        return json_response({
+            'description': render_fallback_news(data.get('country', 'Global'),
+                                                data.get('topic', 'Breaking News'),
+                                                minute_timestamp()),
+            'success': False,
+            'error': str(e),
+            'timestamp': iso_timestamp()
+        }, 500)
+
+@app.route('/get_news_stream', methods=['POST', 'OPTIONS'])
+def get_news_stream():
+    """Stream the AI summary to the client as server-sent events"""
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    data, error = parse_news_request()
+    if error:
+        return json_response({'success': False, 'error': error}, 400)
+    country = data.get('country', 'Global')
+    topic = data.get('topic', 'Breaking News')
+    original_language = data.get('original_language', 'en')
+    needs_translation = data.get('needs_translation', False) and original_language != 'en'
+    
+    log.info("📡 Streaming news request: country=%s topic=%s", country, topic)
+    start_time = time.perf_counter()
+    
+    # A cached summary goes out as a single event
+    cache_key = get_cache_key(country, topic, original_language, needs_translation)
+    revision = cache_revision(country)
+    cached, _ = cache_lookup(cache_key, revision)
+    if cached is not None:
+        cached = orjson.loads(cached)
+        events = sse_event({'delta': cached['description']})
+        if needs_translation and cached.get('translated_description'):
+            events += sse_event({'translated': cached['translated_description']})
+        return Response(events + b"data: [DONE]\n\n", mimetype='text/event-stream',
+                        headers={'X-Cache': 'HIT'})
+    
+    language = language_name(original_language)
+    articles = get_rss_feed(country, topic)
+    if not articles:
+        fallback = render_fallback_news(display_name(country), display_name(topic),
+                                        minute_timestamp())
+        return Response(sse_event({'delta': fallback}) + b"data: [DONE]\n\n",
+                        mimetype='text/event-stream')
+    
+    prompt = build_news_prompt(articles, country, topic, language)
+    
+    # With a translation API, each finished paragraph is translated while
+    # Groq is still writing the next one
+    overlap_translation = (needs_translation and bool(GOOGLE_TRANSLATE_API_KEY)
+                           and not translate_breaker_open())
+    
+    def generate():
+        chunks = []
+        translations = []
+        tail = ''
+        deltas = stream_groq(prompt)
+        while True:
+            try:
+                delta = next(deltas)
+            except StopIteration as stop:
+                completed = stop.value
+                break
+            chunks.append(delta)
+            yield sse_event({'delta': delta})
+            
+            if overlap_translation:
+                tail += delta
+                if '\n\n' in tail:
+                    paragraphs, tail = tail.rsplit('\n\n', 1)
+                    translations.append(executor.submit(translate_text, paragraphs,
+                                                        original_language))
         
-        # Clean old cache entries
-        cleanup_cache()
+        if chunks:
+            summary, provider = ''.join(chunks), 'Groq'
+        else:
+            # No streaming provider available: send the whole summary at once
+            completed = True
+            summary, provider = generate_ai_summary(articles, country, topic, language)
+            yield sse_event({'delta': summary})
         
-        print(f"   ✅ Response ready ({response_data['processing_time']}s)")
-        return jsonify(response_data)
+        # The translation is sent as one event once the summary is complete
+        translated_summary, translated = None, True
+        if needs_translation and completed:
+            if translations:
+                if tail.strip():
+                    translations.append(executor.submit(translate_text, tail,
+                                                        original_language))
+                results = [future.result() for future in translations]
+                translated_summary = '\n\n'.join(text for text, _ in results)
+                translated = all(ok for _, ok in results)
+            else:
+                translated_summary, translated = translate_text(summary, original_language)
+            yield sse_event({'translated': translated_summary})
         
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        import traceback
-        traceback.print_exc()
+        yield b"data: [DONE]\n\n"
         
-        return jsonify({
-            'description': f"""📢 **News Update for {data.get('country', 'Global')}**
-
-**Topic:** {data.get('topic', 'Breaking News')}
-
-Due to high demand, our AI systems are processing your request.
-In the meantime, here are the latest developments:
-
-• Digital transformation continues across various sectors
-• New initiatives focus on sustainable development
-• Global partnerships strengthen economic ties
-• Innovation in technology drives progress
-
-For live updates, check major news outlets.
-
-*Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M')}*
-*Powered by AI News Assistant*""",
-            'success': False,
-            'error': str(e),
-            'timestamp': datetime.now().isoformat()
-        }), 500
+        # Only a finished, fully translated summary is worth caching for
+        # later requests
+        if completed and provider is not None and translated:
+            response_data = build_news_response(country, topic, original_language, summary,
+                                                provider, len(articles), cache_key, start_time,
+                                                translated_summary)
+            cache_store(cache_key, revision, orjson.dumps(response_data))
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Cache': 'MISS'})
 
-def cleanup_cache():
-    """Remove cache entries older than 2 hours"""
-    cutoff = datetime.now() - timedelta(hours=2)
-    keys_to_remove = []
+@app.route('/invalidate', methods=['POST'])
+def invalidate_cache():
+    """Drop all cached summaries for a country by bumping its revision"""
+    if not INVALIDATE_TOKEN:
+        return json_response({'success': False, 'error': 'invalidation is disabled'}, 403)
+    if not hmac.compare_digest(request.headers.get('Authorization', ''),
+                               f"Bearer {INVALIDATE_TOKEN}"):
+        return json_response({'success': False, 'error': 'unauthorized'}, 401)
     
-    for key, value in news_cache.items():
-        if value['timestamp'] < cutoff:
-            keys_to_remove.append(key)
+    data, error = parse_news_request()
+    if error is None and not data.get('country'):
+        error = 'country is required'
+    if error:
+        return json_response({'success': False, 'error': error}, 400)
+    country = data['country']
     
-    for key in keys_to_remove:
-        del news_cache[key]
+    name = canonical_name(country)
+    with news_cache_lock:
+        cache_revisions[name] += 1
+        revision = cache_revisions[name]
     
-    if keys_to_remove:
-        print(f"Cleaned up {len(keys_to_remove)} cache entries")
+    # The shared counter is what other workers read; once it moves, their
+    # local entries and the old Redis entries are no longer looked up
+    if redis_client is not None:
+        try:
+            revision = redis_client.incr(REVISION_KEY_PREFIX + name)
+        except redis.RedisError as e:
+            log.warning("Redis invalidate error: %s", e)
+        with news_cache_lock:
+            cache_revisions[name] = revision
+            revision_cache[name] = revision
+    
+    log.info("Invalidated cache for %s (revision %d)", country, revision)
+    return json_response({'success': True, 'country': country, 'revision': revision})
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
+    return json_response({
         'status': 'healthy',
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': iso_timestamp(),
         'environment': SERVER_ENV,
         'cache_size': len(news_cache),
         'apis_available': {
@@ -373,28 +1489,52 @@ def health_check():
         }
     })
 
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """In-process cache occupancy and hit rate for this worker"""
+    with news_cache_lock:
+        return json_response({
+            'size': len(news_cache),
+            'maxsize': news_cache.maxsize,
+            'failures': len(failure_cache),
+            'hits': cache_counters['hits'],
+            'misses': cache_counters['misses']
+        })
+
+# /test body is constant apart from its timestamp, so encode it once and
+# splice the current timestamp in on each call
+_TEST_PREFIX, _TEST_SUFFIX = orjson.dumps({
+    'message': 'AI News Server is running!',
+    'endpoints': {
+        '/get_news': 'GET (query parameters) or POST - Get news summary',
+        '/get_news_stream': 'POST - Stream news summary (server-sent events)',
+        '/invalidate': 'POST - Invalidate cached summaries for a country',
+        '/cache/stats': 'GET - Cache size and hit/miss counters',
+        '/health': 'GET - Health check',
+        '/test': 'GET - This endpoint'
+    },
+    'environment': SERVER_ENV,
+    'timestamp': '__TIMESTAMP__'
+}).split(b'"__TIMESTAMP__"')
+
 @app.route('/test', methods=['GET'])
 def test_endpoint():
     """Test endpoint with sample data"""
-    return jsonify({
-        'message': 'AI News Server is running!',
-        'endpoints': {
-            '/get_news': 'POST - Get news summary',
-            '/health': 'GET - Health check',
-            '/test': 'GET - This endpoint'
-        },
-        'environment': SERVER_ENV,
-        'timestamp': datetime.now().isoformat()
-    })
+    timestamp = orjson.dumps(iso_timestamp())
+    return Response(_TEST_PREFIX + timestamp + _TEST_SUFFIX, mimetype='application/json')
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8000))
-    print(f"\n✅ Server ready on port {port}")
-    print(f"🌐 Environment: {SERVER_ENV}")
-    print(f"🔗 Health check: http://localhost:{port}/health")
-    print(f"🧪 Test endpoint: http://localhost:{port}/test")
-    print(f"🤖 Available AI providers: {'HuggingFace' if HUGGINGFACE_API_KEY else 'None'}, "
-          f"{'Groq' if GROQ_API_KEY else 'None'}")
-    print("=" * 50)
-    
-    app.run(host='0.0.0.0', port=port, debug=(SERVER_ENV == 'development'))
\ No newline at end of file
+    log.info("✅ Server ready on port %s", port)
+    log.info("🌐 Environment: %s", SERVER_ENV)
+    log.info("🔗 Health check: http://localhost:%s/health", port)
+    log.info("🧪 Test endpoint: http://localhost:%s/test", port)
+    log.info("🤖 Available AI providers: %s, %s",
+             'HuggingFace' if HUGGINGFACE_API_KEY else 'None',
+             'Groq' if GROQ_API_KEY else 'None')
+    if SERVER_ENV != 'development':
+        log.warning("⚠️ Running the Werkzeug development server; deploy with "
+                    "`gunicorn wsgi:app` (settings in gunicorn.conf.py)")
+    
+    app.run(host='0.0.0.0', port=port, debug=(SERVER_ENV == 'development'),
+            threaded=True, processes=1)
\ No newline at end of file
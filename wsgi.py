@@ -0,0 +1,6 @@
+# wsgi.py - gunicorn entry point; patches the standard library for gevent
+# before server.py (and requests, redis, httpx) create any sockets or locks
+from gevent import monkey
+monkey.patch_all()
+
+from server import app  # noqa: E402